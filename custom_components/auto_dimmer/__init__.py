@@ -9,6 +9,8 @@ from typing import Any
 import asyncio
 import logging
 
+import voluptuous as vol
+
 from homeassistant.const import CONF_NAME
 from .const import (
     DOMAIN,
@@ -22,25 +24,98 @@ from .const import (
     CONF_MORNING_END_TIME,
     CONF_AFTERNOON_START_TIME,
     CONF_AFTERNOON_END_TIME,
+    CONF_MORNING_START_TYPE,
+    CONF_MORNING_END_TYPE,
+    CONF_AFTERNOON_START_TYPE,
+    CONF_AFTERNOON_END_TYPE,
+    CONF_MORNING_START_OFFSET,
+    CONF_MORNING_END_OFFSET,
+    CONF_AFTERNOON_START_OFFSET,
+    CONF_AFTERNOON_END_OFFSET,
+    TIME_OPTION_SPECIFY,
+    TIME_OPTION_SUNRISE_OFFSET,
+    TIME_OPTION_SUNSET_OFFSET,
+    SERVICE_PREVIEW_SCHEDULE,
+    ATTR_DIMMER,
+    ATTR_START_DATE,
+    ATTR_DAYS,
+    ATTR_RESOLUTION,
+    DEFAULT_PREVIEW_DAYS,
+    DEFAULT_PREVIEW_RESOLUTION,
+    MAX_PREVIEW_DAYS,
 )
 
 from .auto_dimmer import AutoDimmer
+from .schedule import async_preview_schedule
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.typing import ConfigType
+import homeassistant.helpers.config_validation as cv
+import homeassistant.util.dt as dt_util
 from homeassistant.config_entries import ConfigEntry
 
 from datetime import datetime, timedelta
 
 _LOGGER = logging.getLogger(__name__)
 
+PREVIEW_OPTIONS_SCHEMA = {
+    vol.Optional(CONF_MIN_BRIGHTNESS): vol.All(vol.Coerce(int), vol.Range(min=1, max=255)),
+    vol.Optional(CONF_MAX_BRIGHTNESS): vol.All(vol.Coerce(int), vol.Range(min=1, max=255)),
+    vol.Optional(CONF_MORNING_START_TYPE): vol.In([TIME_OPTION_SPECIFY, TIME_OPTION_SUNRISE_OFFSET]),
+    vol.Optional(CONF_MORNING_END_TYPE): vol.In([TIME_OPTION_SPECIFY, TIME_OPTION_SUNRISE_OFFSET]),
+    vol.Optional(CONF_AFTERNOON_START_TYPE): vol.In([TIME_OPTION_SPECIFY, TIME_OPTION_SUNSET_OFFSET]),
+    vol.Optional(CONF_AFTERNOON_END_TYPE): vol.In([TIME_OPTION_SPECIFY, TIME_OPTION_SUNSET_OFFSET]),
+    vol.Optional(CONF_MORNING_START_TIME): cv.time,
+    vol.Optional(CONF_MORNING_END_TIME): cv.time,
+    vol.Optional(CONF_AFTERNOON_START_TIME): cv.time,
+    vol.Optional(CONF_AFTERNOON_END_TIME): cv.time,
+    vol.Optional(CONF_MORNING_START_OFFSET): vol.Coerce(int),
+    vol.Optional(CONF_MORNING_END_OFFSET): vol.Coerce(int),
+    vol.Optional(CONF_AFTERNOON_START_OFFSET): vol.Coerce(int),
+    vol.Optional(CONF_AFTERNOON_END_OFFSET): vol.Coerce(int),
+}
+
+PREVIEW_SCHEDULE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DIMMER): cv.string,
+        vol.Optional(ATTR_START_DATE): cv.date,
+        vol.Optional(ATTR_DAYS, default=DEFAULT_PREVIEW_DAYS): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_PREVIEW_DAYS)),
+        vol.Optional(ATTR_RESOLUTION, default=DEFAULT_PREVIEW_RESOLUTION): vol.All(vol.Coerce(int), vol.Range(min=1, max=1440)),
+        **PREVIEW_OPTIONS_SCHEMA,
+    }
+)
+
 async def async_setup(hass: HomeAssistant, base_config: ConfigType) -> bool:
     """Set up the auto dimmer component."""
     hass.data.setdefault(DOMAIN, {})
 
     _LOGGER.debug("auto-dimmer async_setup: base_config: %s", DOMAIN)
 
+    async def async_handle_preview_schedule(call: ServiceCall) -> ServiceResponse:
+        """Return the brightness curve of a dimmer, or of a proposed set of options."""
+        options = {key.schema: call.data[key.schema] for key in PREVIEW_OPTIONS_SCHEMA if key.schema in call.data}
+        start_date = call.data.get(ATTR_START_DATE, dt_util.now().date())
+        days = call.data[ATTR_DAYS]
+        resolution = call.data[ATTR_RESOLUTION]
+
+        if (name := call.data.get(ATTR_DIMMER)) is None:
+            return await async_preview_schedule(hass, options, start_date, days, resolution)
+
+        for myautodimmer in hass.data[DOMAIN].values():
+            if myautodimmer._name == name:
+                return await myautodimmer.async_preview(start_date, days, resolution, options)
+        raise HomeAssistantError(f"Auto dimmer {name} is not configured")
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PREVIEW_SCHEDULE,
+        async_handle_preview_schedule,
+        schema=PREVIEW_SCHEDULE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
     if DOMAIN in base_config:
         dimmer_configs = base_config[DOMAIN]
         for config in dimmer_configs:
@@ -2,56 +2,51 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from datetime import datetime, timedelta, date
+from itertools import count
+from functools import partial
+from datetime import datetime, date
 
 from typing import Any
 
 _LOGGER = logging.getLogger(__name__)
 
-from homeassistant.core import HomeAssistant, Event, EventStateChangedData
+from homeassistant.core import Context, HomeAssistant, Event, EventStateChangedData
 from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
 from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_TRANSITION
-from homeassistant.helpers.event import async_track_time_interval, async_track_state_change_event
-from homeassistant.helpers.sun import get_astral_event_next
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later, async_track_time_interval, async_track_state_change_event
 import homeassistant.util.dt as dt_util
 
 from homeassistant.const import (
     ATTR_ENTITY_ID,
     SERVICE_TURN_ON,
-    SUN_EVENT_SUNRISE,
-    SUN_EVENT_SUNSET,
 )
 
 from .const import (
     CONF_LIGHTS,
     CONF_MAX_BRIGHTNESS,
     CONF_MIN_BRIGHTNESS,
-    CONF_MORNING_START_TYPE,
-    CONF_MORNING_END_TYPE,
-    CONF_AFTERNOON_START_TYPE,
-    CONF_AFTERNOON_END_TYPE,
-    CONF_MORNING_START_TIME,
-    CONF_MORNING_END_TIME,
-    CONF_AFTERNOON_START_TIME,
-    CONF_AFTERNOON_END_TIME,
-    CONF_MORNING_START_OFFSET,
-    CONF_MORNING_END_OFFSET,
-    CONF_AFTERNOON_START_OFFSET,
-    CONF_AFTERNOON_END_OFFSET,
-    TIME_OPTION_SPECIFY,
-    DEFAULT_MORNING_START_TIME,
-    DEFAULT_MORNING_END_TIME,
-    DEFAULT_AFTERNOON_START_TIME,
-    DEFAULT_AFTERNOON_END_TIME,
-    DEFAULT_OFFSET,
+    CONF_PRESTAGE,
+    CONF_VERIFY_DELAY,
+    CONF_VERIFY_RETRIES,
+    CONF_DEBUG_ENTITIES,
+    DEFAULT_PRESTAGE,
+    DEFAULT_VERIFY_DELAY,
+    DEFAULT_VERIFY_RETRIES,
+    DEFAULT_DEBUG_ENTITIES,
+    BRIGHTNESS_TOLERANCE,
+    CONTEXT_WINDOW,
+    SETTLE_WINDOW,
+    ZHA_DOMAIN,
+    ZHA_SERVICE_CLUSTER_COMMAND,
+    ZHA_LEVEL_CLUSTER_ID,
+    ZHA_MOVE_TO_LEVEL_COMMAND,
+    ZHA_EXECUTE_IF_OFF,
+    ZHA_MAX_LEVEL,
+    ZHA_GROUP_UNIQUE_ID_PREFIX,
 )
-
-def _is_time_between(check_time, start_time, end_time) -> bool:
-    """Check if check_time is between start_time and end_time."""
-    if start_time <= end_time:
-        return start_time <= check_time < end_time
-    else:
-        return start_time <= check_time or check_time < end_time
+from .schedule import async_preview_schedule, calculate_brightness, calculate_schedule, sun_times
 
 class AutoDimmer():
     """Auto Dimmer brightness."""
@@ -71,21 +66,21 @@ class AutoDimmer():
         self._light_data: dict[str, dict[str,Any]] = {}
         self._max_brightness: int = config_options[CONF_MAX_BRIGHTNESS]
         self._min_brightness: int = config_options[CONF_MIN_BRIGHTNESS]
-        
-        self._conf_morning_start_type = config_options[CONF_MORNING_START_TYPE]
-        self._conf_morning_end_type = config_options[CONF_MORNING_END_TYPE]
-        self._conf_afternoon_start_type = config_options[CONF_AFTERNOON_START_TYPE]
-        self._conf_afternoon_end_type = config_options[CONF_AFTERNOON_END_TYPE]
-        
-        self._conf_morning_start_time = config_options.get(CONF_MORNING_START_TIME, DEFAULT_MORNING_START_TIME)
-        self._conf_morning_end_time =  config_options.get(CONF_MORNING_END_TIME, DEFAULT_MORNING_END_TIME)
-        self._conf_afternoon_start_time =  config_options.get(CONF_AFTERNOON_START_TIME, DEFAULT_AFTERNOON_START_TIME)
-        self._conf_afternoon_end_time =  config_options.get(CONF_AFTERNOON_END_TIME, DEFAULT_AFTERNOON_END_TIME)
-        
-        self._conf_morning_start_offset =  config_options.get(CONF_MORNING_START_OFFSET, DEFAULT_OFFSET)
-        self._conf_morning_end_offset =  config_options.get(CONF_MORNING_END_OFFSET, DEFAULT_OFFSET)
-        self._conf_afternoon_start_offset =  config_options.get(CONF_AFTERNOON_START_OFFSET, DEFAULT_OFFSET)
-        self._conf_afternoon_end_offset =  config_options.get(CONF_AFTERNOON_END_OFFSET, DEFAULT_OFFSET)
+        self._prestage: bool = config_options.get(CONF_PRESTAGE, DEFAULT_PRESTAGE)
+        self._prestage_task: asyncio.Task | None = None
+        # Lights without a ZHA target, found on the first prestage attempt and not queued again
+        self._prestage_unsupported: set[str] = set()
+        self._verify_delay: int = config_options.get(CONF_VERIFY_DELAY, DEFAULT_VERIFY_DELAY)
+        self._verify_retries: int = config_options.get(CONF_VERIFY_RETRIES, DEFAULT_VERIFY_RETRIES)
+        # Pending checks, one per batch, keyed by check id
+        self._pending_verify: dict[int, Any] = {}
+        self._verify_ids = count()
+        self._debug_entities = set(config_options.get(CONF_DEBUG_ENTITIES, DEFAULT_DEBUG_ENTITIES))
+        self._config_options = dict(config_options)
+        # Context ids of our own service calls, used to tell our changes apart from manual ones
+        self._context_ids: dict[str, float] = {}
+        # Members of native hardware light groups, kept current by state change events
+        self._group_members: dict[str, set[str]] = {}
 
         self._today: datetime = dt_util.start_of_local_day(dt_util.now())
 
@@ -103,8 +98,13 @@ class AutoDimmer():
                 light, {
                     "entity_name": light,
                     "enabled": True,
+                    "overridden": False,
+                    "state": None,
+                    "brightness": None,
                     "last_brightness": None,
                     "last_update": None,
+                    "staged_brightness": None,
+                    "settle_until": 0.0,
                 }
             )
 
@@ -113,36 +113,18 @@ class AutoDimmer():
     def _calculate_schedule(self):
         """calculate sunrise and sunset times for current day"""
    
-        self._sunrise_time = dt_util.as_local(get_astral_event_next(self._hass, SUN_EVENT_SUNRISE, self._today))
-        self._sunset_time = dt_util.as_local(get_astral_event_next(self._hass, SUN_EVENT_SUNSET, self._today))
-        
+        self._sunrise_time, self._sunset_time = sun_times(self._hass, self._today)
+
         _LOGGER.debug("schedule; sunrise time: %s", self._sunrise_time)
         _LOGGER.debug("schedule; sunset time: %s",  self._sunset_time)
-        
-        #Morning Start Time:
-        if self._conf_morning_start_type == TIME_OPTION_SPECIFY:
-            self.morning_start_time = dt_util.as_local(datetime.combine(self._today, dt_util.parse_time(self._conf_morning_start_time)))
-        else:
-            self.morning_start_time = self._sunrise_time + timedelta(minutes=self._conf_morning_start_offset)
-        
-        #Morning Finish Time:
-        if self._conf_morning_end_type == TIME_OPTION_SPECIFY:
-            self.morning_end_time = dt_util.as_local(datetime.combine(self._today, dt_util.parse_time(self._conf_morning_end_time)))
-        else:
-            self.morning_end_time = self._sunrise_time + timedelta(minutes=self._conf_morning_end_offset)
-        
-        #Afternoon Start Time:
-        if self._conf_afternoon_start_type == TIME_OPTION_SPECIFY:
-            self.afternoon_start_time = dt_util.as_local(datetime.combine(self._today, dt_util.parse_time(self._conf_afternoon_start_time)))
-        else:
-            self.afternoon_start_time = self._sunset_time + timedelta(minutes=self._conf_afternoon_start_offset)
-        
-        #Afternoon Finish Time:
-        if self._conf_afternoon_end_type == TIME_OPTION_SPECIFY:
-            self.afternoon_end_time = dt_util.as_local(datetime.combine(self._today, dt_util.parse_time(self._conf_afternoon_end_time)))
-        else:
-            self.afternoon_end_time = self._sunset_time + timedelta(minutes=self._conf_afternoon_end_offset)
-        
+
+        (
+            self.morning_start_time,
+            self.morning_end_time,
+            self.afternoon_start_time,
+            self.afternoon_end_time,
+        ) = calculate_schedule(self._hass, self._today, self._config_options)
+
         _LOGGER.debug("schedule; morning start time: %s", self.morning_start_time)
         _LOGGER.debug("schedule; morning end time: %s", self.morning_end_time)
         _LOGGER.debug("schedule; afternoon start time: %s", self.afternoon_start_time)
@@ -151,10 +133,26 @@ class AutoDimmer():
     async def _async_init(self, interval):
         _LOGGER.debug("AutoDimmer _async_init; interval: %s", interval)
 
+        for light in self._light_entities:
+            self._update_light_state(light, self._hass.states.get(light))
+
         self._track_state_change_event = async_track_state_change_event(
             self._hass, self._light_entities, self._state_changed
         )
 
+        for entry in list(er.async_get(self._hass).entities.values()):
+            if (
+                entry.domain == LIGHT_DOMAIN
+                and entry.platform == ZHA_DOMAIN
+                and entry.unique_id.startswith(ZHA_GROUP_UNIQUE_ID_PREFIX)
+                and entry.entity_id not in self._light_data
+            ):
+                self._update_group_members(entry.entity_id, self._hass.states.get(entry.entity_id))
+
+        self._track_group_state_change_event = async_track_state_change_event(
+            self._hass, list(self._group_members), self._group_state_changed
+        )
+
         self._track_time_interval = async_track_time_interval(self._hass, self.async_update, interval)
 
         self._hass.loop.create_task(self.async_update())
@@ -164,10 +162,69 @@ class AutoDimmer():
         """Unsubscribe to tracks for unload."""
         self._track_time_interval()
         self._track_state_change_event()
+        self._track_group_state_change_event()
+        if self._prestage_task and not self._prestage_task.done():
+            self._prestage_task.cancel()
+        for cancel_verify in self._pending_verify.values():
+            cancel_verify()
+        self._pending_verify.clear()
         return True
 
 
-    async def _set_brightness(self, light: str, brightness: int):
+    def _update_light_state(self, light: str, state):
+        """Cache the state and brightness of a light, kept current by state change events."""
+
+        light_data = self._light_data[light]
+        if state is None:
+            light_data["state"] = None
+            light_data["brightness"] = None
+        else:
+            light_data["state"] = state.state
+            light_data["brightness"] = state.attributes.get(ATTR_BRIGHTNESS)
+
+
+    def _update_group_members(self, group_entity: str, state):
+        """Cache the member lights of a native hardware light group."""
+
+        members = state.attributes.get(ATTR_ENTITY_ID) if state else None
+        if isinstance(members, (list, tuple)):
+            self._group_members[group_entity] = set(members)
+        else:
+            self._group_members[group_entity] = set()
+
+
+    async def _group_state_changed(self, event):
+        """state of a tracked light group has changed, refresh its members"""
+        self._update_group_members(event.data["entity_id"], event.data["new_state"])
+
+
+    def _new_context(self) -> Context:
+        """Return a context for our own service calls, remembered for CONTEXT_WINDOW seconds."""
+
+        now = self._hass.loop.time()
+        # Contexts are added in time order, so the expired ones are at the start
+        for context_id, expires in list(self._context_ids.items()):
+            if expires > now:
+                break
+            del self._context_ids[context_id]
+
+        context = Context()
+        self._context_ids[context.id] = now + CONTEXT_WINDOW
+        return context
+
+
+    def _is_own_change(self, context: Context, light_data: dict[str, Any], brightness: int | None) -> bool:
+        """Check if a brightness change was caused by our own service calls."""
+
+        if context.id in self._context_ids or context.parent_id in self._context_ids:
+            return True
+
+        # Devices may report the new level later without our context, e.g. zigbee group members
+        last_brightness = light_data["last_brightness"]
+        return brightness is not None and last_brightness is not None and abs(brightness - last_brightness) <= BRIGHTNESS_TOLERANCE
+
+
+    async def _set_brightness(self, light: str, brightness: int, context: Context | None = None):
         """Set the brightness of a light entity."""
 
         await self._hass.services.async_call(
@@ -175,10 +232,212 @@ class AutoDimmer():
             SERVICE_TURN_ON,
             {ATTR_ENTITY_ID: light, ATTR_BRIGHTNESS: brightness},
             blocking=True,
+            context=context or self._new_context(),
         )
         await self._hass.async_block_till_done()
         #await self._async_update()
-        _LOGGER.debug("Auto Dim: Adjust light %s, to %s", light, brightness)
+        if light in self._debug_entities:
+            _LOGGER.debug("Auto Dim: Adjust light %s, to %s", light, brightness)
+
+
+    async def _try_set_brightness(self, light: str, brightness: int, context: Context) -> bool:
+        """Set the brightness of a light entity, a failed command is left for the verify check."""
+
+        try:
+            await self._set_brightness(light, brightness, context)
+        except HomeAssistantError as err:
+            _LOGGER.warning("Auto Dim: Adjust light %s, to %s failed: %s", light, brightness, err)
+            return False
+        return True
+
+
+    def _settle(self, light: str, seconds: float):
+        """Hold off classifying reports without our context for a light that is still settling."""
+        self._light_data[light]["settle_until"] = self._hass.loop.time() + seconds
+
+
+    def _should_adjust(self, light: str) -> bool:
+        """Check if a light is still on and under control."""
+        light_data = self._light_data[light]
+        return light_data["enabled"] and light_data["state"] == "on"
+
+
+    def _group_targets(self, lights: list[str]) -> tuple[list[str], list[str]]:
+        """Find native hardware light groups whose members are all in lights.
+
+        Returns the group entities to target, and the lights not covered by a group.
+        """
+        remaining = set(lights)
+
+        # Prefer the largest groups, a group is only used if every member needs the same adjustment
+        groups = []
+        for group_entity, members in sorted(self._group_members.items(), key=lambda item: len(item[1]), reverse=True):
+            if len(members) > 1 and members <= remaining:
+                groups.append(group_entity)
+                remaining -= members
+
+        return groups, [light for light in lights if light in remaining]
+
+
+    async def _adjust_lights(self, lights: dict[str, int], brightness: int):
+        """Set the brightness of a batch of lights, using group entities where possible.
+
+        lights maps each light entity to its brightness before the adjustment.
+        """
+
+        groups, remaining = self._group_targets(list(lights))
+        context = self._new_context()
+
+        # Set before sending, so state changes reported during the calls are recognised as ours.
+        # Intermediate reports, e.g. during a device transition, are left for the verify check to settle
+        for light in lights:
+            self._light_data[light]["last_brightness"] = brightness
+            self._settle(light, self._verify_delay + SETTLE_WINDOW)
+
+        # Each send waits for the call to finish, check again right before it in case a light was turned off meanwhile
+        for group_entity in groups:
+            members = self._group_members.get(group_entity, set())
+            if members <= lights.keys() and all(self._should_adjust(member) for member in members):
+                _LOGGER.debug("Auto Dim: Adjust group %s in place of its member lights", group_entity)
+                await self._try_set_brightness(group_entity, brightness, context)
+            else:
+                remaining.extend(member for member in lights if member in members)
+
+        for light in remaining:
+            if self._should_adjust(light):
+                await self._try_set_brightness(light, brightness, context)
+            elif light in self._debug_entities:
+                _LOGGER.debug("Auto Dim: light %s was turned off or disabled, skipping adjustment", light)
+
+        self._schedule_verify(lights, brightness, self._verify_retries)
+
+
+    def _schedule_verify(self, lights: dict[str, int], brightness: int, retries: int):
+        """Schedule a check of the lights in a batch, independent of checks for other batches.
+
+        The check always runs to settle the lights, retries limits how often missed lights are re-sent.
+        """
+
+        check_id = next(self._verify_ids)
+        self._pending_verify[check_id] = async_call_later(
+            self._hass, self._verify_delay, partial(self._async_verify, check_id, lights, brightness, retries)
+        )
+
+
+    async def _async_verify(self, check_id: int, lights: dict[str, int], brightness: int, retries: int, _now=None):
+        """Re-send the brightness to lights in a batch that missed the command."""
+
+        self._pending_verify.pop(check_id, None)
+        missed = {}
+        settled = changed = 0
+
+        for light, previous_brightness in lights.items():
+            light_data = self._light_data[light]
+            if not light_data["enabled"] or light_data["last_brightness"] != brightness:
+                continue
+
+            if light_data["state"] != "on":
+                continue
+
+            current_brightness = light_data["brightness"]
+            light_data["settle_until"] = 0.0
+            if current_brightness is None or abs(current_brightness - brightness) <= BRIGHTNESS_TOLERANCE:
+                settled += 1
+                continue
+
+            if abs(current_brightness - previous_brightness) <= BRIGHTNESS_TOLERANCE:
+                # Brightness has not moved since the command was sent, assume it was dropped
+                missed[light] = previous_brightness
+            else:
+                # Light has settled somewhere else, it was manually adjusted
+                if light in self._debug_entities:
+                    _LOGGER.debug("verify; light entity: %s changed to %s, manually adjusted.  Disabling", light, current_brightness)
+                light_data["enabled"] = False
+                light_data["overridden"] = True
+                changed += 1
+
+        _LOGGER.debug(
+            "verify; dimmer: %s brightness: %s settled: %s missed: %s changed: %s retries left: %s",
+            self._name, brightness, settled, len(missed), changed, retries,
+        )
+
+        if not missed or retries <= 0:
+            return
+
+        context = self._new_context()
+        for light in missed:
+            if light in self._debug_entities:
+                _LOGGER.debug("verify; light entity: %s missed brightness %s, re-sending", light, brightness)
+            self._settle(light, self._verify_delay + SETTLE_WINDOW)
+            await self._try_set_brightness(light, brightness, context)
+
+        self._schedule_verify(missed, brightness, retries - 1)
+
+
+    def _prestage_target(self, light: str) -> tuple[str, int] | None:
+        """Return the zigbee ieee and endpoint for a light that supports setting level while off."""
+
+        entry = er.async_get(self._hass).async_get(light)
+        if entry is None or entry.platform != ZHA_DOMAIN:
+            return None
+
+        # ZHA light unique ids are formatted as "<ieee>-<endpoint id>"
+        ieee, _, endpoint_id = entry.unique_id.rpartition("-")
+        if not ieee or not endpoint_id.isdigit():
+            return None
+        return ieee, int(endpoint_id)
+
+
+    async def _prestage_lights(self, lights: list[str], brightness: int):
+        """Push the scheduled brightness to lights that are off, without turning them on."""
+
+        context = self._new_context()
+        staged = unsupported = failed = 0
+        for light in lights:
+            if (target := self._prestage_target(light)) is None:
+                if light in self._debug_entities:
+                    _LOGGER.debug("prestage; light entity: %s does not support setting level while off", light)
+                self._prestage_unsupported.add(light)
+                unsupported += 1
+                continue
+
+            ieee, endpoint_id = target
+            try:
+                await self._hass.services.async_call(
+                    ZHA_DOMAIN,
+                    ZHA_SERVICE_CLUSTER_COMMAND,
+                    {
+                        "ieee": ieee,
+                        "endpoint_id": endpoint_id,
+                        "cluster_id": ZHA_LEVEL_CLUSTER_ID,
+                        "cluster_type": "in",
+                        "command": ZHA_MOVE_TO_LEVEL_COMMAND,
+                        "command_type": "server",
+                        "params": {
+                            "level": min(brightness, ZHA_MAX_LEVEL),
+                            "transition_time": 0,
+                            "options_mask": ZHA_EXECUTE_IF_OFF,
+                            "options_override": ZHA_EXECUTE_IF_OFF,
+                        },
+                    },
+                    blocking=True,
+                    context=context,
+                )
+            except HomeAssistantError as err:
+                if light in self._debug_entities:
+                    _LOGGER.debug("prestage; light entity: %s failed: %s", light, err)
+                failed += 1
+                continue
+
+            self._light_data[light]["staged_brightness"] = brightness
+            if light in self._debug_entities:
+                _LOGGER.debug("prestage; light entity: %s staged at %s", light, brightness)
+            staged += 1
+
+        _LOGGER.debug(
+            "prestage; dimmer: %s brightness: %s staged: %s unsupported: %s failed: %s",
+            self._name, brightness, staged, unsupported, failed,
+        )
 
 
     async def _calculate_brightness(self):
@@ -189,75 +448,86 @@ class AutoDimmer():
 
         current_time = dt_util.now()
         
-        _LOGGER.debug("calc bright; Dimmer Name: %s", self._name)
-        _LOGGER.debug("calc bright; current time: %s", current_time)
-
-        brightness_delta = maximum_brightness - mininum_brightness
-        morning_time_delta = (self.morning_end_time - self.morning_start_time).total_seconds()
-        afternoon_time_delta = (self.afternoon_end_time - self.afternoon_start_time).total_seconds()
-
-        if _is_time_between(current_time, self.morning_end_time, self.afternoon_start_time):
-            # During Mid Day
-            _LOGGER.debug("calc bright; mid day")
-            return maximum_brightness
-        elif _is_time_between(current_time, self.morning_start_time, self.morning_end_time):
-            # During Morning Transition
-            _LOGGER.debug("calc bright; morning transition")
-            current_delta = (current_time - self.morning_start_time).total_seconds()
-            return round((current_delta/morning_time_delta)*brightness_delta)+mininum_brightness
-        elif _is_time_between(current_time, self.afternoon_start_time, self.afternoon_end_time):
-            # During Afternoon Transition
-            _LOGGER.debug("calc bright; afternoon transition")
-            current_delta = (current_time - self.afternoon_start_time).total_seconds()
-            return maximum_brightness-round((current_delta/afternoon_time_delta)*brightness_delta)
-        
-        # Sleep Time, minumim brighness
-        _LOGGER.debug("calc bright; morning/evening minimum brightness")
-        return mininum_brightness
+        schedule = (self.morning_start_time, self.morning_end_time, self.afternoon_start_time, self.afternoon_end_time)
+        return calculate_brightness(current_time, schedule, mininum_brightness, maximum_brightness)
+
+
+    async def async_preview(self, start_date: date, days: int, resolution: int, options: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Return the brightness curve over a date range, optionally with proposed options applied."""
+        return await async_preview_schedule(self._hass, {**self._config_options, **(options or {})}, start_date, days, resolution)
 
 
     async def async_update(self, var1=None):
         """Update the brightness for each light"""
 
-        _LOGGER.debug("async_update")
-
         if (dt_util.start_of_local_day(dt_util.now()) - self._today).days > 0:
             # A new day has ticked by since last update, recalculate schedule times
             self._today = dt_util.start_of_local_day(dt_util.now())
             self._calculate_schedule()
 
         new_brightness = await self._calculate_brightness()
+        adjust_lights = {}
+        stage_lights = []
+        unchanged = skipped_off = skipped_disabled = overridden = 0
+
+        # Per light details are only logged for the sampled debug entities, checked once per update
+        debug_entities = self._debug_entities if _LOGGER.isEnabledFor(logging.DEBUG) else ()
 
+        # States are cached from state change events, manual adjustments are detected as they arrive
         for light_entity in self._light_entities:
             
-            current_state = self._hass.states.get(light_entity)
+            light_data = self._light_data[light_entity]
+            log_light = light_entity in debug_entities
 
-            if current_state and current_state.state == "on":
-                current_brightness = current_state.attributes[ATTR_BRIGHTNESS]
-                last_brightness = self._light_data[light_entity]["last_brightness"]
+            if light_data["state"] == "on" and light_data["brightness"] is not None:
+                current_brightness = light_data["brightness"]
 
-                _LOGGER.debug("auto dimmer update: light entity: %s current brightness: %s", light_entity, current_brightness)
-                light_data = self._light_data[light_entity]
+                if log_light:
+                    _LOGGER.debug("auto dimmer update: light entity: %s current brightness: %s", light_entity, current_brightness)
                 if light_data["enabled"]:
                     # Light is enabled, adjust brightness if required
                     if current_brightness != new_brightness:
-                        # Test to see if the current brightness matches our last setting, if not, disable control
-                        if last_brightness is None or (current_brightness <= (last_brightness+2) and current_brightness >= (last_brightness-2)):
-                            # brightness adjustment required, current brightness doesn't match new brightness
+                        if log_light:
                             _LOGGER.debug("auto dimmer update: light entity: %s adjusted brightness to: %s", light_entity, new_brightness)
-                            await self._set_brightness(light_entity, new_brightness)
-                            self._light_data[light_entity]["last_brightness"] = new_brightness
-                        else:
-                            # Light was manually adjusted, disable and ignore future updates
-                            _LOGGER.debug("auto dimmer update: light entity: %s was manually adjusted.  Disabling", light_entity)
-                            self._light_data[light_entity]["enabled"] = False
+                        adjust_lights[light_entity] = current_brightness
                     else:
-                        _LOGGER.debug("auto dimmer update: light %s brightness is the same, no adjustment", light_entity)        
+                        if log_light:
+                            _LOGGER.debug("auto dimmer update: light %s brightness is the same, no adjustment", light_entity)
+                        unchanged += 1
+                elif light_data["overridden"]:
+                    if log_light:
+                        _LOGGER.debug("auto dimmer update: light entity: %s was manually adjusted, no adjustment", light_entity)
+                    overridden += 1
                 else:
-                    _LOGGER.debug("auto dimmer update: light entity: %s is disabled, no adjustment", light_entity)
+                    if log_light:
+                        _LOGGER.debug("auto dimmer update: light entity: %s is disabled, no adjustment", light_entity)
+                    skipped_disabled += 1
             else:
-                _LOGGER.debug("auto dimmer update: light entity: %s state is off, no adjustment", light_entity)
-            
+                if log_light:
+                    _LOGGER.debug("auto dimmer update: light entity: %s state is off, no adjustment", light_entity)
+                skipped_off += 1
+                if (
+                    self._prestage
+                    and light_data["state"] == "off"
+                    and light_data["staged_brightness"] != new_brightness
+                    and light_entity not in self._prestage_unsupported
+                ):
+                    stage_lights.append(light_entity)
+
+        _LOGGER.debug(
+            "auto dimmer update: dimmer: %s brightness: %s adjusted: %s unchanged: %s skipped off: %s skipped disabled: %s overridden: %s",
+            self._name, new_brightness, len(adjust_lights), unchanged, skipped_off, skipped_disabled, overridden,
+        )
+
+        if adjust_lights:
+            await self._adjust_lights(adjust_lights, new_brightness)
+
+        if stage_lights and (self._prestage_task is None or self._prestage_task.done()):
+            # Low priority, lights that are off are staged in the background after the on lights are adjusted
+            self._prestage_task = self._hass.async_create_background_task(
+                self._prestage_lights(stage_lights, new_brightness), f"{self._name} prestage"
+            )
+
     
     async def _state_changed(self, event):
         """state of a tracked light entity has changed, process based on new state"""
@@ -270,17 +540,41 @@ class AutoDimmer():
             # Entity is not ready yet, ignore:
             _LOGGER.debug("_state_changed - no ready: %s ",entity_id)
             return
-        elif from_state is None:
+
+        self._update_light_state(entity_id, to_state)
+        light_data = self._light_data[entity_id]
+
+        if from_state is None:
             # Initial Startup, do nothing
             _LOGGER.debug("_state_changed - Initial Startup: %s ",entity_id)
             self._hass.loop.create_task(self.async_update())
-        elif to_state.state != "on":
+        elif to_state is None or to_state.state != "on":
             # this light entity was turned off, disable updates
             _LOGGER.debug("_state_changed - Turned Off - Disable: %s ",entity_id)
             self._light_data[entity_id]["enabled"] = False
+            self._light_data[entity_id]["staged_brightness"] = None
         elif from_state.state == "off":
             # this light entity was just turned from off to on, enable and update
             _LOGGER.debug("_state_changed - Off to On - Enable and Update: %s ",entity_id)
             self._light_data[entity_id]["enabled"] = True
+            self._light_data[entity_id]["overridden"] = False
             self._light_data[entity_id]["last_brightness"] = None
+            # Lights may report intermediate levels while turning on
+            self._settle(entity_id, SETTLE_WINDOW)
             self._hass.loop.create_task(self.async_update())
+        elif from_state.state == "on" and light_data["brightness"] != from_state.attributes.get(ATTR_BRIGHTNESS):
+            # Brightness changed while on, check if it was our own call or a manual adjustment
+            log_light = entity_id in self._debug_entities
+            if self._is_own_change(event.context, light_data, light_data["brightness"]):
+                if log_light:
+                    _LOGGER.debug("_state_changed - Own Adjustment: %s ",entity_id)
+            elif self._hass.loop.time() < light_data["settle_until"]:
+                # Command in flight or not yet verified, the verify check settles this light
+                if log_light:
+                    _LOGGER.debug("_state_changed - Settling, not classified: %s ",entity_id)
+            elif light_data["enabled"]:
+                # Light was manually adjusted, disable and ignore future updates
+                if log_light:
+                    _LOGGER.debug("_state_changed - Manually Adjusted - Disable: %s ",entity_id)
+                light_data["enabled"] = False
+                light_data["overridden"] = True
@@ -8,13 +8,11 @@ import voluptuous as vol
 from homeassistant.core import HomeAssistant, callback
 from homeassistant import config_entries
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_NAME, ATTR_SUPPORTED_FEATURES, SUN_EVENT_SUNRISE, SUN_EVENT_SUNSET
+from homeassistant.const import CONF_NAME, ATTR_SUPPORTED_FEATURES
 from homeassistant.components.light import ATTR_BRIGHTNESS
 from homeassistant.helpers.selector import selector
-from homeassistant.helpers.sun import get_astral_event_next
 
 import homeassistant.util.dt as dt_util
-from datetime import datetime, timedelta
 
 import homeassistant.helpers.config_validation as cv
 
@@ -24,6 +22,7 @@ from .const import (
     DOMAIN, 
     CONF_LIGHTS, 
     CONF_INTERVAL,
+    CONF_DEBUG_ENTITIES,
     STEP_IMPORT_FAILED,
     ABORT_REASON_IMPORT_FAILED,
     OPTION_INIT_FIELDS,
@@ -39,20 +38,12 @@ from .const import (
     CONF_MORNING_END_TYPE,
     CONF_AFTERNOON_START_TYPE,
     CONF_AFTERNOON_END_TYPE,
-    CONF_MORNING_START_TIME,
-    CONF_MORNING_END_TIME,
-    CONF_AFTERNOON_START_TIME,
-    CONF_AFTERNOON_END_TIME,
-    CONF_MORNING_START_OFFSET,
-    CONF_MORNING_END_OFFSET,
-    CONF_AFTERNOON_START_OFFSET,
-    CONF_AFTERNOON_END_OFFSET,
-    TIME_OPTION_SPECIFY,
     TIME_OPTION_SUNRISE_OFFSET,
     TIME_OPTION_SUNSET_OFFSET,
     DEFAULT_MORNING_START_TIME,
     DEFAULT_AFTERNOON_END_TIME,
 )
+from .schedule import calculate_schedule
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -126,36 +117,12 @@ def validate_schedule_options(hass, options, user_input, errors):
 
     today = dt_util.start_of_local_day(dt_util.now())
 
-    sunrise_time = dt_util.as_local(get_astral_event_next(hass, SUN_EVENT_SUNRISE, today))
-    sunset_time = dt_util.as_local(get_astral_event_next(hass, SUN_EVENT_SUNSET, today))
-
-    #sunrise_time = dt_util.as_local(datetime.combine(today, dt_util.parse_time(DEFAULT_MORNING_START_TIME)))
-    #sunset_time = dt_util.as_local(datetime.combine(today, dt_util.parse_time(DEFAULT_AFTERNOON_END_TIME)))
-
-    #Morning Start Time:
-    if options[CONF_MORNING_START_TYPE] == TIME_OPTION_SPECIFY:
-        morning_start_time = dt_util.as_local(datetime.combine(today, dt_util.parse_time(user_input[CONF_MORNING_START_TIME])))
-    else:
-        morning_start_time = sunrise_time + timedelta(minutes=user_input[CONF_MORNING_START_OFFSET])
-    
-    #Morning Finish Time:
-    if options[CONF_MORNING_END_TYPE] == TIME_OPTION_SPECIFY:
-        morning_end_time = dt_util.as_local(datetime.combine(today, dt_util.parse_time(user_input[CONF_MORNING_END_TIME])))
-    else:
-        morning_end_time = sunrise_time + timedelta(minutes=user_input[CONF_MORNING_END_OFFSET])
-    
-    #Afternoon Start Time:
-    if options[CONF_AFTERNOON_START_TYPE] == TIME_OPTION_SPECIFY:
-        afternoon_start_time = dt_util.as_local(datetime.combine(today, dt_util.parse_time(user_input[CONF_AFTERNOON_START_TIME])))
-    else:
-        afternoon_start_time = sunset_time + timedelta(minutes=user_input[CONF_AFTERNOON_START_OFFSET])
-    
-    #Afternoon Finish Time:
-    if options[CONF_AFTERNOON_END_TYPE] == TIME_OPTION_SPECIFY:
-        afternoon_end_time = dt_util.as_local(datetime.combine(today, dt_util.parse_time(user_input[CONF_AFTERNOON_END_TIME])))
-    else:
-        afternoon_end_time = sunset_time + timedelta(minutes=user_input[CONF_AFTERNOON_END_OFFSET])
-
+    (
+        morning_start_time,
+        morning_end_time,
+        afternoon_start_time,
+        afternoon_end_time,
+    ) = calculate_schedule(hass, today, {**options, **user_input})
 
     if morning_end_time < morning_start_time:
         errors["base"] = "morning_schedule"
@@ -166,9 +133,6 @@ def validate_schedule_options(hass, options, user_input, errors):
     if afternoon_end_time < afternoon_start_time:
         errors["base"] = "afternoon_schedule"
 
-    _LOGGER.debug("sunrise: %s", sunrise_time)
-    _LOGGER.debug("sunset: %s", sunset_time)
-
     _LOGGER.debug("morning_start: %s", morning_start_time)
     _LOGGER.debug("morning_end: %s", morning_end_time)
     _LOGGER.debug("afternoon_start: %s", afternoon_start_time)
@@ -258,7 +222,10 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     configured_light,
                 )
                 all_lights.append(configured_light)
-        to_replace = {CONF_LIGHTS: cv.multi_select(sorted(all_lights))}
+        to_replace = {
+            CONF_LIGHTS: cv.multi_select(sorted(all_lights)),
+            CONF_DEBUG_ENTITIES: cv.multi_select(sorted(all_lights)),
+        }
 
         options_schema = build_init_schema(OPTION_INIT_FIELDS, self._options, to_replace)
         return self.async_show_form(
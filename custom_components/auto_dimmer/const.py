@@ -12,6 +12,19 @@ DEFAULT_INTERVAL = 5
 DEFAULT_LIGHTS = []
 DEFAULT_MAX_BRIGHTNESS = 255
 DEFAULT_MIN_BRIGHTNESS = 25
+DEFAULT_PRESTAGE = False
+DEFAULT_VERIFY_DELAY = 5
+DEFAULT_VERIFY_RETRIES = 1
+DEFAULT_DEBUG_ENTITIES = []
+
+# Allowed difference between the set brightness and the reported brightness
+BRIGHTNESS_TOLERANCE = 2
+
+# Seconds a service call context is remembered to recognise our own state changes
+CONTEXT_WINDOW = 120
+
+# Seconds after a command, or after a light is turned on, in which reports without our context are not classified
+SETTLE_WINDOW = 5
 
 TIME_OPTION_SPECIFY = "specify a time"
 TIME_OPTION_SUNRISE_OFFSET = "sunrise with offset"
@@ -33,6 +46,10 @@ CONF_INTERVAL = "interval"
 CONF_TRANSITION = "transition"
 CONF_MAX_BRIGHTNESS = "max_brightness"
 CONF_MIN_BRIGHTNESS = "min_brightness"
+CONF_PRESTAGE = "prestage_off_lights"
+CONF_VERIFY_DELAY = "verify_delay"
+CONF_VERIFY_RETRIES = "verify_retries"
+CONF_DEBUG_ENTITIES = "debug_entities"
 
 CONF_MORNING_START_TYPE = "morning_start_type"
 CONF_MORNING_END_TYPE = "morning_end_type"
@@ -49,6 +66,26 @@ CONF_MORNING_END_OFFSET = "morning_end_offset"
 CONF_AFTERNOON_START_OFFSET = "afternoon_start_offset"
 CONF_AFTERNOON_END_OFFSET = "afternoon_end_offset"
 
+# Zigbee level control cluster, move_to_level with the "execute if off" option bit set
+ZHA_DOMAIN = "zha"
+ZHA_SERVICE_CLUSTER_COMMAND = "issue_zigbee_cluster_command"
+ZHA_LEVEL_CLUSTER_ID = 8
+ZHA_MOVE_TO_LEVEL_COMMAND = 0
+ZHA_EXECUTE_IF_OFF = 1
+ZHA_MAX_LEVEL = 254
+
+# ZHA group lights are native zigbee groups, one command reaches every member
+ZHA_GROUP_UNIQUE_ID_PREFIX = "light_zha_group_"
+
+SERVICE_PREVIEW_SCHEDULE = "preview_schedule"
+ATTR_DIMMER = "dimmer"
+ATTR_START_DATE = "start_date"
+ATTR_DAYS = "days"
+ATTR_RESOLUTION = "resolution"
+DEFAULT_PREVIEW_DAYS = 1
+DEFAULT_PREVIEW_RESOLUTION = 15
+MAX_PREVIEW_DAYS = 366
+
 STEP_IMPORT_FAILED = "import_failed"
 ABORT_REASON_IMPORT_FAILED = "import_failed"
 
@@ -57,6 +94,10 @@ OPTION_INIT_FIELDS = [
     (CONF_INTERVAL, DEFAULT_INTERVAL, cv.positive_int),
     (CONF_MIN_BRIGHTNESS, DEFAULT_MIN_BRIGHTNESS, selector({"number": {"mode": "slider", "min": 1, "max": 255, "unit_of_measurement": "lumens"}})),
     (CONF_MAX_BRIGHTNESS, DEFAULT_MAX_BRIGHTNESS, selector({"number": {"mode": "slider", "min": 1, "max": 255, "unit_of_measurement": "lumens"}})),
+    (CONF_PRESTAGE, DEFAULT_PRESTAGE, bool),
+    (CONF_VERIFY_DELAY, DEFAULT_VERIFY_DELAY, cv.positive_int),
+    (CONF_VERIFY_RETRIES, DEFAULT_VERIFY_RETRIES, cv.positive_int),
+    (CONF_DEBUG_ENTITIES, DEFAULT_DEBUG_ENTITIES, cv.entity_ids),
     (CONF_MORNING_START_TYPE, DEFAULT_MORNING_START_TYPE, selector({"select": {"mode": "dropdown", "options": [TIME_OPTION_SPECIFY, TIME_OPTION_SUNRISE_OFFSET]}})),
     (CONF_MORNING_END_TYPE, DEFAULT_MORNING_END_TYPE, selector({"select": {"mode": "dropdown", "options": [TIME_OPTION_SPECIFY, TIME_OPTION_SUNRISE_OFFSET]}})),
     (CONF_AFTERNOON_START_TYPE, DEFAULT_AFTERNOON_START_TYPE, selector({"select": {"mode": "dropdown", "options": [TIME_OPTION_SPECIFY, TIME_OPTION_SUNSET_OFFSET]}})),
@@ -5,8 +5,9 @@ from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
 
-from .const import DOMAIN
+from .const import DOMAIN, DEFAULT_PREVIEW_DAYS, DEFAULT_PREVIEW_RESOLUTION
 from .auto_dimmer import AutoDimmer
 
 
@@ -33,5 +34,8 @@ async def async_get_config_entry_diagnostics(
         },
         "light data": {
             "lights": dict(auto_dimmer._light_data),
-        }
+        },
+        "schedule preview": await auto_dimmer.async_preview(
+            dt_util.now().date(), DEFAULT_PREVIEW_DAYS, DEFAULT_PREVIEW_RESOLUTION
+        ),
     }
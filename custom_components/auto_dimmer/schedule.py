@@ -0,0 +1,231 @@
+"""Schedule and brightness curve calculations for Auto Dimmer."""
+from __future__ import annotations
+
+import logging
+import math
+from datetime import date, datetime, time, timedelta
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.sun import get_astral_event_next
+import homeassistant.util.dt as dt_util
+
+from homeassistant.const import (
+    SUN_EVENT_SUNRISE,
+    SUN_EVENT_SUNSET,
+)
+
+from .const import (
+    CONF_MAX_BRIGHTNESS,
+    CONF_MIN_BRIGHTNESS,
+    CONF_MORNING_START_TYPE,
+    CONF_MORNING_END_TYPE,
+    CONF_AFTERNOON_START_TYPE,
+    CONF_AFTERNOON_END_TYPE,
+    CONF_MORNING_START_TIME,
+    CONF_MORNING_END_TIME,
+    CONF_AFTERNOON_START_TIME,
+    CONF_AFTERNOON_END_TIME,
+    CONF_MORNING_START_OFFSET,
+    CONF_MORNING_END_OFFSET,
+    CONF_AFTERNOON_START_OFFSET,
+    CONF_AFTERNOON_END_OFFSET,
+    TIME_OPTION_SPECIFY,
+    DEFAULT_MAX_BRIGHTNESS,
+    DEFAULT_MIN_BRIGHTNESS,
+    DEFAULT_MORNING_START_TIME,
+    DEFAULT_MORNING_END_TIME,
+    DEFAULT_AFTERNOON_START_TIME,
+    DEFAULT_AFTERNOON_END_TIME,
+    DEFAULT_OFFSET,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Sunrise and sunset per (latitude, longitude, date), shared by all dimmers and previews
+_SUN_CACHE: dict[tuple[float, float, date], tuple[datetime, datetime]] = {}
+_SUN_CACHE_SIZE = 800
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+def _is_time_between(check_time, start_time, end_time) -> bool:
+    """Check if check_time is between start_time and end_time."""
+    if start_time <= end_time:
+        return start_time <= check_time < end_time
+    else:
+        return start_time <= check_time or check_time < end_time
+
+def _parse_time(value: str | time) -> time:
+    """Return a time from a config option, which is either a time or a string."""
+    if isinstance(value, time):
+        return value
+    return dt_util.parse_time(value)
+
+def sun_times(hass: HomeAssistant, day: datetime) -> tuple[datetime, datetime]:
+    """Return the local sunrise and sunset times following the start of day."""
+
+    key = (hass.config.latitude, hass.config.longitude, day.date())
+    if (times := _SUN_CACHE.get(key)) is None:
+        if len(_SUN_CACHE) >= _SUN_CACHE_SIZE:
+            _SUN_CACHE.clear()
+        times = _SUN_CACHE[key] = (
+            dt_util.as_local(get_astral_event_next(hass, SUN_EVENT_SUNRISE, day)),
+            dt_util.as_local(get_astral_event_next(hass, SUN_EVENT_SUNSET, day)),
+        )
+    return times
+
+def calculate_schedule(
+    hass: HomeAssistant, day: datetime, options: dict[str, Any]
+) -> tuple[datetime, datetime, datetime, datetime]:
+    """Return the morning start, morning end, afternoon start and afternoon end times for day."""
+
+    sunrise_time, sunset_time = sun_times(hass, day)
+
+    def transition_time(type_key, time_key, default_time, offset_key, sun_time):
+        if options.get(type_key, TIME_OPTION_SPECIFY) == TIME_OPTION_SPECIFY:
+            return dt_util.as_local(datetime.combine(day, _parse_time(options.get(time_key, default_time))))
+        return sun_time + timedelta(minutes=options.get(offset_key, DEFAULT_OFFSET))
+
+    return (
+        transition_time(CONF_MORNING_START_TYPE, CONF_MORNING_START_TIME, DEFAULT_MORNING_START_TIME, CONF_MORNING_START_OFFSET, sunrise_time),
+        transition_time(CONF_MORNING_END_TYPE, CONF_MORNING_END_TIME, DEFAULT_MORNING_END_TIME, CONF_MORNING_END_OFFSET, sunrise_time),
+        transition_time(CONF_AFTERNOON_START_TYPE, CONF_AFTERNOON_START_TIME, DEFAULT_AFTERNOON_START_TIME, CONF_AFTERNOON_START_OFFSET, sunset_time),
+        transition_time(CONF_AFTERNOON_END_TYPE, CONF_AFTERNOON_END_TIME, DEFAULT_AFTERNOON_END_TIME, CONF_AFTERNOON_END_OFFSET, sunset_time),
+    )
+
+def calculate_brightness(
+    check_time: datetime,
+    schedule: tuple[datetime, datetime, datetime, datetime],
+    min_brightness: int,
+    max_brightness: int,
+) -> int:
+    """Calculate the light brightness at check_time."""
+
+    morning_start_time, morning_end_time, afternoon_start_time, afternoon_end_time = schedule
+    brightness_delta = max_brightness - min_brightness
+
+    if _is_time_between(check_time, morning_end_time, afternoon_start_time):
+        # During Mid Day
+        return max_brightness
+    elif _is_time_between(check_time, morning_start_time, morning_end_time):
+        # During Morning Transition
+        morning_time_delta = (morning_end_time - morning_start_time).total_seconds()
+        current_delta = (check_time - morning_start_time).total_seconds()
+        return round((current_delta/morning_time_delta)*brightness_delta)+min_brightness
+    elif _is_time_between(check_time, afternoon_start_time, afternoon_end_time):
+        # During Afternoon Transition
+        afternoon_time_delta = (afternoon_end_time - afternoon_start_time).total_seconds()
+        current_delta = (check_time - afternoon_start_time).total_seconds()
+        return max_brightness-round((current_delta/afternoon_time_delta)*brightness_delta)
+
+    # Sleep Time, minumim brighness
+    return min_brightness
+
+def _day_curve(
+    day: datetime,
+    schedule: tuple[datetime, datetime, datetime, datetime],
+    min_brightness: int,
+    max_brightness: int,
+    step: int,
+) -> list[int]:
+    """Sample the brightness every step seconds from the start of day.
+
+    Each part of the schedule is filled as one batch, rather than checking every sample.
+    """
+
+    count = math.ceil(SECONDS_PER_DAY / step)
+    morning_start, morning_end, afternoon_start, afternoon_end = (
+        (transition - day).total_seconds() for transition in schedule
+    )
+
+    if not morning_start <= morning_end <= afternoon_start <= afternoon_end:
+        # Schedule wraps around or overlaps, fall back to checking every sample
+        return [
+            calculate_brightness(day + timedelta(seconds=i*step), schedule, min_brightness, max_brightness)
+            for i in range(count)
+        ]
+
+    def index(seconds):
+        return min(count, max(0, math.ceil(seconds / step)))
+
+    i_morning_start, i_morning_end, i_afternoon_start, i_afternoon_end = (
+        index(seconds) for seconds in (morning_start, morning_end, afternoon_start, afternoon_end)
+    )
+    brightness_delta = max_brightness - min_brightness
+
+    curve = [min_brightness] * i_morning_start
+    if i_morning_end > i_morning_start:
+        morning_time_delta = morning_end - morning_start
+        curve += [round(((i*step - morning_start)/morning_time_delta)*brightness_delta)+min_brightness for i in range(i_morning_start, i_morning_end)]
+    curve += [max_brightness] * (i_afternoon_start - i_morning_end)
+    if i_afternoon_end > i_afternoon_start:
+        afternoon_time_delta = afternoon_end - afternoon_start
+        curve += [max_brightness-round(((i*step - afternoon_start)/afternoon_time_delta)*brightness_delta) for i in range(i_afternoon_start, i_afternoon_end)]
+    curve += [min_brightness] * (count - i_afternoon_end)
+    return curve
+
+def schedule_days(
+    hass: HomeAssistant,
+    options: dict[str, Any],
+    start_date: date,
+    days: int,
+) -> list[tuple[datetime, tuple[datetime, datetime, datetime, datetime]]]:
+    """Return the start and schedule of each day, must be called from the event loop."""
+
+    schedules = []
+    for day_number in range(days):
+        day = dt_util.start_of_local_day(start_date + timedelta(days=day_number))
+        schedules.append((day, calculate_schedule(hass, day, options)))
+    return schedules
+
+def preview_curves(
+    schedules: list[tuple[datetime, tuple[datetime, datetime, datetime, datetime]]],
+    options: dict[str, Any],
+    resolution: int,
+) -> dict[str, Any]:
+    """Return the brightness curve for each day, sampled every resolution minutes.
+
+    Only does the curve math, so it is safe to run in the executor.
+    """
+
+    min_brightness = options.get(CONF_MIN_BRIGHTNESS, DEFAULT_MIN_BRIGHTNESS)
+    max_brightness = options.get(CONF_MAX_BRIGHTNESS, DEFAULT_MAX_BRIGHTNESS)
+    step = resolution * 60
+
+    preview_days = [
+        {
+            "date": day.date().isoformat(),
+            "morning_start_time": schedule[0].isoformat(),
+            "morning_end_time": schedule[1].isoformat(),
+            "afternoon_start_time": schedule[2].isoformat(),
+            "afternoon_end_time": schedule[3].isoformat(),
+            "brightness": _day_curve(day, schedule, min_brightness, max_brightness, step),
+        }
+        for day, schedule in schedules
+    ]
+
+    return {
+        "min_brightness": min_brightness,
+        "max_brightness": max_brightness,
+        "resolution": resolution,
+        "days": preview_days,
+    }
+
+async def async_preview_schedule(
+    hass: HomeAssistant,
+    options: dict[str, Any],
+    start_date: date,
+    days: int,
+    resolution: int,
+) -> dict[str, Any]:
+    """Return the brightness curve for each day, sampled every resolution minutes.
+
+    Sunrise and sunset are looked up in the event loop, the curves are built in the executor.
+    """
+
+    schedules = schedule_days(hass, options, start_date, days)
+
+    _LOGGER.debug("preview; %s days from %s at %s minute resolution", days, start_date, resolution)
+
+    return await hass.async_add_executor_job(preview_curves, schedules, options, resolution)